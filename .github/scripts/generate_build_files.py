@@ -7,21 +7,96 @@ Generates makefiles and Visual Studio project files for VeraLuxPixInsight module
 import os
 import sys
 import argparse
-from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from datetime import datetime, timezone
 import uuid
 
 # Module name
 MODULE_NAME = "VeraLuxPixInsight"
 
+# Directories that never contain generator inputs (VCS metadata, CI files,
+# prebuilt binaries and the generated per-platform build trees)
+SKIP_DIRS = frozenset({
+    '.git', '.github', 'bin', 'linux', 'macosx', 'windows',
+    '__pycache__', 'node_modules', '.venv', 'venv',
+})
+
+def _scandir_recursive(root, skip_dirs=SKIP_DIRS):
+    """Yield (relative path, file name) for every regular file under root
+
+    The relative prefix tracked on the stack already carries its trailing
+    separator, so each entry's relative path is a single concatenation with
+    no Path construction in the loop.
+    """
+    stack = [(str(root), "")]
+    while stack:
+        abs_dir, rel_prefix = stack.pop()
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in skip_dirs:
+                        continue
+                    stack.append((entry.path, rel_prefix + entry.name + "/"))
+                elif entry.is_file(follow_symlinks=False):
+                    yield rel_prefix + entry.name, entry.name
+
+def collect_sources(root, buckets):
+    """Dispatch every file under root into the bucket matching its extension
+
+    buckets maps a tuple of extensions to the list that collects matching
+    relative paths, so a single traversal serves all extension groups.
+    """
+    items = tuple(buckets.items())
+    for rel, name in _scandir_recursive(root):
+        for exts, bucket in items:
+            if name.endswith(exts):
+                bucket.append(rel)
+                break
+
+def _sorted_paths(rels):
+    """Sort relative path strings and wrap them as PurePosixPath
+
+    Sorting the strings avoids the per-comparison path reparsing that
+    sorting PurePath objects incurs.
+    """
+    rels.sort()
+    return [PurePosixPath(r) for r in rels]
+
 def find_files(directory, extensions):
     """Recursively find files with given extensions"""
     files = []
-    for ext in extensions:
-        files.extend(Path(directory).rglob(f"*{ext}"))
-    return sorted([f.relative_to(directory) for f in files])
+    collect_sources(directory, {tuple(extensions): files})
+    return _sorted_paths(files)
+
+def build_timestamp():
+    """Generation timestamp, honoring SOURCE_DATE_EPOCH for reproducible output"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch is not None:
+        stamp = datetime.fromtimestamp(int(epoch), tz=timezone.utc)
+        return stamp.isoformat().replace('+00:00', '') + 'Z'
+    return datetime.now().isoformat() + 'Z'
+
+def write_if_changed(path, content):
+    """Write content to path, skipping the write when the file already matches
+
+    Leaving an up-to-date file untouched preserves its mtime, so downstream
+    make/ccache incremental state survives a regeneration.
+    """
+    data = content.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
+# Compile pattern rule shared by the root and per-subdirectory rules;
+# subdir is either empty or carries a trailing slash
+_RULE_TMPL = """./x64/Release/src/{subdir}%.o: ../../src/{subdir}%.cpp
+\tmkdir -p $(@D)
+\t{cmd} -MMD -MP -MF"$(@:%.o=%.d)" -o"$@" "$<"
+\t@echo ' '"""
 
-def generate_unix_makefile_x64(platform, repo_root, src_files):
+def generate_unix_makefile_x64(platform, repo_root, src_files, now):
     """Generate makefile-x64 for Linux or macOS"""
     
     # Platform-specific settings
@@ -64,42 +139,35 @@ def generate_unix_makefile_x64(platform, repo_root, src_files):
             '-Wall -Wno-parentheses -Wno-extern-c-compat'
         )
     
-    # Generate source file list
-    src_list = " \\\n".join([f"../../src/{f}" for f in src_files])
-    
-    # Generate object file list
-    obj_list = " \\\n".join([f"./x64/Release/src/{Path(f).with_suffix('.o')}" for f in src_files])
-    
-    # Generate dependency file list
-    dep_list = " \\\n".join([f"./x64/Release/src/{Path(f).with_suffix('.d')}" for f in src_files])
-    
-    # Get unique subdirectories for pattern rules
+    # Generate the source/object/dependency file lists and collect the
+    # unique subdirectories for pattern rules in a single pass, parsing
+    # each path only once
+    src_lines, obj_lines, dep_lines = [], [], []
     subdirs = set()
     for f in src_files:
-        parent = Path(f).parent
-        if str(parent) != '.':
-            subdirs.add(str(parent))
+        s = f.as_posix()
+        stem = s[:s.rfind('.')]
+        src_lines.append(f"../../src/{s}")
+        obj_lines.append(f"./x64/Release/src/{stem}.o")
+        dep_lines.append(f"./x64/Release/src/{stem}.d")
+        slash = s.rfind('/')
+        if slash != -1:
+            subdirs.add(s[:slash])
+    src_list = " \\\n".join(src_lines)
+    obj_list = " \\\n".join(obj_lines)
+    dep_list = " \\\n".join(dep_lines)
     
-    # Generate pattern rules for each subdirectory
-    pattern_rules = []
-    for subdir in sorted(subdirs):
-        rule = f"""./x64/Release/src/{subdir}/%.o: ../../src/{subdir}/%.cpp
-\tmkdir -p $(@D)
-\t{compiler} {compiler_flags} -MMD -MP -MF"$(@:%.o=%.d)" -o"$@" "$<"
-\t@echo ' '"""
-        pattern_rules.append(rule)
+    # Generate pattern rules from the shared template: the root rule first,
+    # then one rule per subdirectory
+    cmd = f"{compiler} {compiler_flags}"
+    pattern_rules = [_RULE_TMPL.format(subdir="", cmd=cmd)]
+    pattern_rules.extend(_RULE_TMPL.format(subdir=f"{subdir}/", cmd=cmd)
+                         for subdir in sorted(subdirs))
     
-    # Pattern rule for root directory
-    root_rule = f"""./x64/Release/src/%.o: ../../src/%.cpp
-\tmkdir -p $(@D)
-\t{compiler} {compiler_flags} -MMD -MP -MF"$(@:%.o=%.d)" -o"$@" "$<"
-\t@echo ' '"""
-    pattern_rules.insert(0, root_rule)
-    
-    # Generate makefile content
-    now = datetime.now().isoformat() + 'Z'
+    # Generate makefile content, accumulating sections in a list and
+    # joining once at the end
     platform_label = "MacOSX" if platform == "macosx" else "Linux"
-    content = f"""######################################################################
+    buf = [f"""######################################################################
 # PixInsight Makefile Generator Script v1.144
 # Copyright (C) 2009-2026 Pleiades Astrophoto
 ######################################################################
@@ -156,15 +224,13 @@ post-build:
 \tcp $(OBJ_DIR)/{MODULE_NAME}-pxm.{output_ext} $(PCLBINDIR64)
 \tmkdir -p ../../bin/{bin_dir}
 \tcp $(OBJ_DIR)/{MODULE_NAME}-pxm.{output_ext} ../../bin/{bin_dir}/
+"""]
+    buf.extend(pattern_rules)
+    buf.append("\n")
+    return "\n".join(buf)
 
-{chr(10).join(pattern_rules)}
-
-"""
-    return content
-
-def generate_unix_makefile(platform):
+def generate_unix_makefile(platform, now):
     """Generate main Makefile wrapper"""
-    now = datetime.now().isoformat() + 'Z'
     platform_label = "MacOSX" if platform == "macosx" else "Linux"
     content = f"""######################################################################
 # PixInsight Makefile Generator Script v1.144
@@ -192,21 +258,34 @@ clean:
 """
     return content
 
-def generate_vcxproj(repo_root, src_files, header_files, resource_files):
-    """Generate Visual Studio project file"""
-    now = datetime.now().isoformat() + 'Z'
-    
+_WIN_TRANS = str.maketrans({'/': '\\\\'})
+
+def to_windows_paths(files):
+    """Convert posix-relative paths to the escaped form used in VS project files"""
+    return [str(f).translate(_WIN_TRANS) for f in files]
+
+def _win_item(tag, prefix, win_path):
+    """Format a single MSBuild item element from an already-converted path"""
+    return f'    <{tag} Include="{prefix}{win_path}"/>'
+
+def generate_vcxproj(repo_root, src_files, header_files, resource_files, now):
+    """Generate Visual Studio project file
+
+    File lists are expected in the converted Windows form produced by
+    to_windows_paths, shared with generate_vcxproj_filters.
+    """
+
     # Generate ClCompile items
-    compile_items = "\n".join([f'    <ClCompile Include="..\\..\\src\\{str(f).replace("/", "\\\\")}\"/>' 
-                               for f in src_files])
-    
+    compile_items = "\n".join(_win_item("ClCompile", "..\\..\\src\\", f)
+                               for f in src_files)
+
     # Generate ClInclude items
-    include_items = "\n".join([f'    <ClInclude Include="..\\..\\src\\{str(f).replace("/", "\\\\")}\"/>' 
-                               for f in header_files])
-    
+    include_items = "\n".join(_win_item("ClInclude", "..\\..\\src\\", f)
+                               for f in header_files)
+
     # Generate None (resource) items
-    resource_items = "\n".join([f'    <None Include="..\\..\\{str(f).replace("/", "\\\\")}\"/>' 
-                                for f in resource_files])
+    resource_items = "\n".join(_win_item("None", "..\\..\\", f)
+                                for f in resource_files)
     
     content = f"""<?xml version="1.0" encoding="utf-8"?>
 <!--
@@ -232,7 +311,7 @@ def generate_vcxproj(repo_root, src_files, header_files, resource_files):
     </ProjectConfiguration>
   </ItemGroup>
   <PropertyGroup Label="Globals">
-    <ProjectGuid>{{{str(uuid.uuid4()).upper()}}}</ProjectGuid>
+    <ProjectGuid>{{{str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{MODULE_NAME}/project")).upper()}}}</ProjectGuid>
     <RootNamespace>PixInsight</RootNamespace>
     <Keyword>Win32Proj</Keyword>
   </PropertyGroup>
@@ -367,21 +446,24 @@ xcopy /Y "$(OutDir){MODULE_NAME}-pxm.dll" "..\\..\\bin\\windows\\"</Command>
 """
     return content
 
-def generate_vcxproj_filters(src_files, header_files, resource_files):
-    """Generate Visual Studio filters file"""
-    now = datetime.now().isoformat() + 'Z'
+def generate_vcxproj_filters(src_files, header_files, resource_files, now):
+    """Generate Visual Studio filters file
+
+    File lists are expected in the converted Windows form produced by
+    to_windows_paths, shared with generate_vcxproj.
+    """
     
     # Generate ClCompile items with filters
-    compile_items = "\n".join([f'    <ClCompile Include="..\\..\\src\\{str(f).replace("/", "\\\\")}">\\n        <Filter>Source Files</Filter>\\n    </ClCompile>' 
-                               for f in src_files])
+    compile_items = "\n".join(f'    <ClCompile Include="..\\..\\src\\{f}">\\n        <Filter>Source Files</Filter>\\n    </ClCompile>'
+                               for f in src_files)
     
     # Generate ClInclude items with filters
-    include_items = "\n".join([f'    <ClInclude Include="..\\..\\src\\{str(f).replace("/", "\\\\")}">\\n        <Filter>Header Files</Filter>\\n    </ClInclude>' 
-                               for f in header_files])
+    include_items = "\n".join(f'    <ClInclude Include="..\\..\\src\\{f}">\\n        <Filter>Header Files</Filter>\\n    </ClInclude>'
+                               for f in header_files)
     
     # Generate None items with filters
-    resource_items = "\n".join([f'    <None Include="..\\..\\{str(f).replace("/", "\\\\")}">\\n        <Filter>Image Files</Filter>\\n    </None>' 
-                                for f in resource_files])
+    resource_items = "\n".join(f'    <None Include="..\\..\\{f}">\\n        <Filter>Image Files</Filter>\\n    </None>'
+                                for f in resource_files)
     
     content = f"""<?xml version="1.0" encoding="utf-8"?>
 <!--
@@ -398,13 +480,13 @@ def generate_vcxproj_filters(src_files, header_files, resource_files):
 <Project DefaultTargets="Build" ToolsVersion="4.0" xmlns="http://schemas.microsoft.com/developer/msbuild/2003">
   <ItemGroup>
     <Filter Include="Source Files">
-      <UniqueIdentifier>{{{str(uuid.uuid4()).lower()}}}</UniqueIdentifier>
+      <UniqueIdentifier>{{{str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{MODULE_NAME}/filters/SourceFiles")).lower()}}}</UniqueIdentifier>
     </Filter>
     <Filter Include="Header Files">
-      <UniqueIdentifier>{{{str(uuid.uuid4()).lower()}}}</UniqueIdentifier>
+      <UniqueIdentifier>{{{str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{MODULE_NAME}/filters/HeaderFiles")).lower()}}}</UniqueIdentifier>
     </Filter>
     <Filter Include="Image Files">
-      <UniqueIdentifier>{{{str(uuid.uuid4()).lower()}}}</UniqueIdentifier>
+      <UniqueIdentifier>{{{str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{MODULE_NAME}/filters/ImageFiles")).lower()}}}</UniqueIdentifier>
     </Filter>
   </ItemGroup>
   <ItemGroup>
@@ -437,61 +519,85 @@ def main():
         script_dir = Path(__file__).parent
         repo_root = script_dir.parent.parent
     
-    print(f"Repository root: {repo_root}")
-    
-    # Find source files
-    src_dir = repo_root / "src"
-    if not src_dir.exists():
+    # Work with plain strings from here on; the walker and generators never
+    # need Path arithmetic on the roots
+    repo_root_s = str(repo_root)
+    src_dir = os.path.join(repo_root_s, "src")
+    if not os.path.isdir(src_dir):
         print(f"Error: Source directory not found: {src_dir}")
         sys.exit(1)
     
-    cpp_files = find_files(src_dir, [".cpp"])
-    h_files = find_files(src_dir, [".h"])
-    svg_files = find_files(repo_root, [".svg"])
-    
-    print(f"Found {len(cpp_files)} .cpp files")
-    print(f"Found {len(h_files)} .h files")
-    print(f"Found {len(svg_files)} .svg files")
-    
     platforms = ['linux', 'macosx', 'windows'] if args.platform == 'all' else [args.platform]
+
+    # Headers and SVG resources only feed the Windows project files, so skip
+    # those scans when windows is not targeted
+    need_windows = 'windows' in platforms
+    cpp_rels, h_rels, svg_rels = [], [], []
+    src_buckets = {(".cpp",): cpp_rels}
+    if need_windows:
+        src_buckets[(".h",)] = h_rels
+    collect_sources(src_dir, src_buckets)
+    if need_windows:
+        collect_sources(repo_root_s, {(".svg",): svg_rels})
+    cpp_files = _sorted_paths(cpp_rels)
+    h_files = _sorted_paths(h_rels)
+    svg_files = _sorted_paths(svg_rels)
+    
+    # One atomic write for the discovery summary
+    summary = f"Repository root: {repo_root}\nFound {len(cpp_files)} .cpp files\n"
+    if need_windows:
+        summary += f"Found {len(h_files)} .h files\nFound {len(svg_files)} .svg files\n"
+    sys.stdout.write(summary)
+
+    # One timestamp for every generated file, so a single run is self-consistent
+    now = build_timestamp()
     
-    for platform in platforms:
+    def _gen_platform(platform):
         print(f"\nGenerating build files for {platform}...")
         
         if platform in ['linux', 'macosx']:
             # Generate Unix makefiles
             platform_dir = repo_root / platform / "g++"
             platform_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Generate main Makefile
-            makefile_content = generate_unix_makefile(platform)
-            makefile_path = platform_dir / "Makefile"
-            makefile_path.write_text(makefile_content)
-            print(f"  Created: {makefile_path}")
-            
-            # Generate makefile-x64
-            makefile_x64_content = generate_unix_makefile_x64(platform, str(repo_root), cpp_files)
-            makefile_x64_path = platform_dir / "makefile-x64"
-            makefile_x64_path.write_text(makefile_x64_content)
-            print(f"  Created: {makefile_x64_path}")
-            
+
+            targets = [
+                (platform_dir / "Makefile",
+                 generate_unix_makefile(platform, now)),
+                (platform_dir / "makefile-x64",
+                 generate_unix_makefile_x64(platform, repo_root_s, cpp_files, now)),
+            ]
+
         elif platform == 'windows':
             # Generate Visual Studio project files
             platform_dir = repo_root / "windows" / "vc17"
             platform_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Generate .vcxproj
-            vcxproj_content = generate_vcxproj(str(repo_root), cpp_files, h_files, svg_files)
-            vcxproj_path = platform_dir / f"{MODULE_NAME}.vcxproj"
-            vcxproj_path.write_text(vcxproj_content)
-            print(f"  Created: {vcxproj_path}")
-            
-            # Generate .vcxproj.filters
-            filters_content = generate_vcxproj_filters(cpp_files, h_files, svg_files)
-            filters_path = platform_dir / f"{MODULE_NAME}.vcxproj.filters"
-            filters_path.write_text(filters_content)
-            print(f"  Created: {filters_path}")
-    
+
+            # Convert path separators once, shared by both project files
+            cpp_win = to_windows_paths(cpp_files)
+            h_win = to_windows_paths(h_files)
+            svg_win = to_windows_paths(svg_files)
+
+            targets = [
+                (platform_dir / f"{MODULE_NAME}.vcxproj",
+                 generate_vcxproj(repo_root_s, cpp_win, h_win, svg_win, now)),
+                (platform_dir / f"{MODULE_NAME}.vcxproj.filters",
+                 generate_vcxproj_filters(cpp_win, h_win, svg_win, now)),
+            ]
+
+        # The two files per platform are independent, so overlap their writes
+        with ThreadPoolExecutor(max_workers=len(targets)) as writers:
+            written = list(writers.map(lambda t: write_if_changed(*t), targets))
+        for (path, _), changed in zip(targets, written):
+            print(f"  Created: {path}" if changed else f"  Unchanged: {path}")
+
+    # Platform generation is independent read-only work over the shared file
+    # lists, so the three targets can run concurrently
+    if len(platforms) > 1:
+        with ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+            list(executor.map(_gen_platform, platforms))
+    else:
+        _gen_platform(platforms[0])
+
     print("\nBuild files generated successfully!")
 
 if __name__ == "__main__":
@@ -9,47 +9,190 @@ import sys
 import argparse
 import zipfile
 import hashlib
+import mmap
+import shutil
+import queue
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from datetime import datetime
 
 MODULE_NAME = "VeraLuxPixInsight"
 MODULE_TITLE = "VeraLux PixInsight Module"
 
+# Bump to invalidate cached archives whenever the packaging format changes
+# (member layout, compression settings, metadata normalization)
+CACHE_FORMAT_VERSION = 2
+
 def calculate_sha1(file_path):
     """Calculate SHA1 hash of a file"""
-    sha1 = hashlib.sha1()
     with open(file_path, 'rb') as f:
-        while chunk := f.read(8192):
-            sha1.update(chunk)
-    return sha1.hexdigest()
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha1').hexdigest()
+        sha1 = hashlib.sha1()
+        try:
+            # Hash the whole mapping in one C call, no read syscalls
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                sha1.update(mm)
+                return sha1.hexdigest()
+        except (ValueError, OSError):
+            # Empty file or mapping failure: chunked read fallback
+            buf = bytearray(1 << 20)
+            view = memoryview(buf)
+            while n := f.readinto(buf):
+                sha1.update(view[:n])
+            return sha1.hexdigest()
+
+class HashingWriter:
+    """File-like writer that hashes every byte as it is written
+
+    Wrapping the package file with this lets the archive be hashed while it
+    is created, instead of re-reading the finished file from disk. It
+    deliberately exposes no seek/tell, so ZipFile uses its streaming layout
+    and the hash sees the final bytes in order. The digest is updated on a
+    worker thread fed through a bounded queue, so SHA1 runs concurrently
+    with compression; call hexdigest() once after the archive is closed.
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._sha1 = hashlib.sha1()
+        self._chunks = queue.Queue(maxsize=8)
+        # Daemonic so an aborted build (exception, Ctrl-C) can never hang
+        # interpreter shutdown on a worker blocked in queue.get()
+        self._hasher = threading.Thread(target=self._hash_worker, daemon=True)
+        self._hasher.start()
+
+    def _hash_worker(self):
+        while (chunk := self._chunks.get()) is not None:
+            self._sha1.update(chunk)
+
+    def write(self, data):
+        # Copy the chunk: the zip layers reuse their write buffers
+        self._chunks.put(bytes(data))
+        return self._fileobj.write(data)
+
+    def flush(self):
+        self._fileobj.flush()
+
+    def close(self):
+        """Stop the hash worker; safe to call more than once"""
+        if self._hasher.is_alive():
+            self._chunks.put(None)
+            self._hasher.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def hexdigest(self):
+        """Stop the hash worker and return the digest of all written bytes"""
+        self.close()
+        return self._sha1.hexdigest()
 
+@lru_cache(maxsize=4)
 def get_module_description(readme_path):
-    """Extract module description from README.md"""
+    """Extract module description from README.md
+
+    Cached per path (passed as str) so repeated callers share one parse.
+    """
     try:
-        with open(readme_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # Look for overview section
+        # Look for overview section, streaming the file and stopping as soon
+        # as the next section or the third collected line is reached
         description = []
         in_overview = False
-        for line in lines:
-            if '## Overview' in line:
-                in_overview = True
-                continue
-            if in_overview:
-                if line.startswith('##'):
-                    break
-                if line.strip() and not line.startswith('#'):
-                    description.append(line.strip())
-        
+        with open(readme_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '## Overview' in line:
+                    in_overview = True
+                    continue
+                if in_overview:
+                    if line.startswith('##'):
+                        break
+                    if line.strip() and not line.startswith('#'):
+                        description.append(line.strip())
+                        if len(description) == 3:  # First 3 lines
+                            break
+
         if description:
-            return ' '.join(description[:3])  # First 3 lines
+            return ' '.join(description)
         return "VeraLux is a professional image processing module for PixInsight that implements scientifically accurate photometric algorithms."
     except:
         return "VeraLux PixInsight Module"
 
-def create_package(platform, version, repo_root, dist_dir):
-    """Create a zip package for a specific platform"""
+def _scandir_files(root, suffix=None):
+    """Yield (absolute path, relative path) for every file under root
+
+    Single os.scandir-based walk; suffix filters on the file name ending
+    when given.
+    """
+    stack = [(str(root), "")]
+    while stack:
+        abs_dir, rel_prefix = stack.pop()
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_prefix + entry.name + "/"))
+                elif entry.is_file(follow_symlinks=False):
+                    if suffix is None or entry.name.endswith(suffix):
+                        yield entry.path, rel_prefix + entry.name
+
+def _add_reproducible(zip_file, disk_path, arcname, date_time, mode=0o644):
+    """Add a file to the archive with normalized metadata
+
+    Fixing the member timestamp and permissions (the zip analogue of a
+    pre-built TarInfo) makes the archive bytes — and so the published
+    SHA1 — depend only on the member contents, not on checkout mtimes.
+    Pass mode=0o755 for members that must keep their exec bit.
+    """
+    info = zipfile.ZipInfo(arcname, date_time=date_time)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    # ZipFile.open(info, 'w') takes its level from the ZipInfo, not from
+    # the ZipFile constructor, so the pin has to live here
+    info._compresslevel = 6
+    info.external_attr = mode << 16
+    with open(disk_path, 'rb') as src, zip_file.open(info, 'w') as dest:
+        # 1 MiB chunks instead of copyfileobj's 64 KiB default, so the
+        # multi-MB module binary moves in a handful of iterations
+        shutil.copyfileobj(src, dest, 1 << 20)
+
+def _package_cache_key(platform, version, date_stamp, binary_path,
+                       svg_files, doc_files):
+    """Content fingerprint for a platform package
+
+    The binary is hashed in full (it dominates the archive); resource and
+    doc members contribute name, size and mtime, so same-size content
+    edits still invalidate the key. The release date stamp is part of the
+    key because it is baked into the archive bytes.
+    """
+    key = hashlib.sha1()
+    key.update(f"{CACHE_FORMAT_VERSION}\0{platform}\0{version}\0"
+               f"{date_stamp}\0{calculate_sha1(binary_path)}".encode())
+    for path, rel in (*svg_files, *doc_files):
+        st = os.stat(path)
+        key.update(f"\0{rel}\0{st.st_size}\0{st.st_mtime_ns}".encode())
+    return key.hexdigest()
+
+def _link_or_copy(src, dst):
+    """Hardlink src to dst, falling back to a copy across filesystems"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def create_package(platform, version, repo_root, dist_dir, svg_files, doc_files):
+    """Create a zip package for a specific platform
+
+    svg_files and doc_files are the precomputed (path, relative path)
+    lists of resource icons and documentation files shared by every
+    platform package.
+    """
     
     # Platform-specific binary extensions
     binary_ext = {
@@ -58,69 +201,116 @@ def create_package(platform, version, repo_root, dist_dir):
         'windows': 'dll'
     }
     
-    # Check if binary exists
+    # Check if binary exists; plain strings and os.path are enough for the
+    # hot file operations here, Path stays at the CLI boundary
     binary_name = f"{MODULE_NAME}-pxm.{binary_ext[platform]}"
-    binary_path = repo_root / "bin" / platform / binary_name
+    binary_path = os.path.join(str(repo_root), "bin", platform, binary_name)
     
-    if not binary_path.exists():
+    if not os.path.exists(binary_path):
         print(f"Error: Binary not found: {binary_path}")
         return None
     
-    # Package filename
-    date_stamp = datetime.now().strftime('%Y%m%d')
+    # Package filename; member timestamps are pinned to the release date
+    build_date = datetime.now()
+    date_stamp = build_date.strftime('%Y%m%d')
+    date_time = (build_date.year, build_date.month, build_date.day, 0, 0, 0)
     package_name = f"{MODULE_NAME}-{platform}-{version}-{date_stamp}.zip"
-    package_path = dist_dir / package_name
-
-    print(f"\nCreating package for {platform}...")
-    print(f"  Binary: {binary_path}")
-    print(f"  Package: {package_name}")
-
-    # Create zip with proper structure
-    with zipfile.ZipFile(package_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add binary to bin/ directory
-        zip_file.write(binary_path, arcname=f"bin/{binary_name}")
-
-        # Add resource files (icons)
-        rsc_dir = repo_root / "rsc"
-        if rsc_dir.exists():
-            for svg_file in rsc_dir.rglob("*.svg"):
-                arcname = f"rsc/{svg_file.relative_to(rsc_dir)}"
-                zip_file.write(svg_file, arcname=arcname)
-                print(f"  Added: {arcname}")
-
-        # Add documentation files
-        doc_tools_dir = repo_root / "doc" / "tools"
-        if doc_tools_dir.exists():
-            for doc_file in doc_tools_dir.rglob("*"):
-                if doc_file.is_file():
-                    arcname = f"doc/tools/{doc_file.relative_to(doc_tools_dir)}"
-                    zip_file.write(doc_file, arcname=arcname)
-                    print(f"  Added: {arcname}")
-
-    # Calculate SHA1
-    sha1 = calculate_sha1(package_path)
-    file_size = package_path.stat().st_size
-    
-    print(f"  Size: {file_size / 1024:.2f} KB")
-    print(f"  SHA1: {sha1}")
+    package_path = os.path.join(str(dist_dir), package_name)
+
+    # Buffer progress messages so parallel packaging keeps stdout ordered
+    log = [f"\nCreating package for {platform}...",
+           f"  Binary: {binary_path}",
+           f"  Package: {package_name}"]
+
+    # Content-addressed cache: when the same inputs were already packaged,
+    # reuse that archive and its recorded SHA1 and skip the whole
+    # compression pass
+    cache_key = _package_cache_key(platform, version, date_stamp,
+                                   binary_path, svg_files, doc_files)
+    cache_dir = os.path.join(str(dist_dir), ".cache")
+    cached_zip = os.path.join(cache_dir, f"{cache_key}.zip")
+    cached_sha1 = f"{cached_zip}.sha1"
+    if os.path.exists(cached_zip) and os.path.exists(cached_sha1):
+        _link_or_copy(cached_zip, package_path)
+        with open(cached_sha1, 'r', encoding='ascii') as f:
+            sha1 = f.read().strip()
+        file_size = os.stat(package_path).st_size
+        log.append("  Reused cached archive (inputs unchanged)")
+        log.append(f"  Size: {file_size / 1024:.2f} KB")
+        log.append(f"  SHA1: {sha1}")
+        return {
+            'platform': platform,
+            'filename': package_name,
+            'sha1': sha1,
+            'size': file_size,
+            'releaseDate': date_stamp,
+            'log': log
+        }
+
+    # Create zip with proper structure, hashing the stream as it is written.
+    # The large output buffer batches the many small member writes into few
+    # write syscalls. Build into a temp file and rename into place so the
+    # final path is never truncated while it shares an inode with a cache
+    # entry from an earlier build.
+    tmp_path = f"{package_path}.tmp"
+    with open(tmp_path, 'wb', buffering=1 << 20) as raw, \
+            HashingWriter(raw) as writer:
+        with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED,
+                             compresslevel=6) as zip_file:
+            # Add binary to bin/ directory; keep it executable
+            _add_reproducible(zip_file, binary_path, f"bin/{binary_name}",
+                              date_time, mode=0o755)
+
+            # Add resource files (icons)
+            for svg_path, svg_rel in svg_files:
+                arcname = f"rsc/{svg_rel}"
+                _add_reproducible(zip_file, svg_path, arcname, date_time)
+                log.append(f"  Added: {arcname}")
+
+            # Add documentation files
+            for doc_path, doc_rel in doc_files:
+                arcname = f"doc/tools/{doc_rel}"
+                _add_reproducible(zip_file, doc_path, arcname, date_time)
+                log.append(f"  Added: {arcname}")
+
+    # SHA1 was accumulated while writing, so no second pass over the file
+    sha1 = writer.hexdigest()
+    os.replace(tmp_path, package_path)
+    file_size = os.stat(package_path).st_size
+
+    # Populate the cache so identical reruns skip the build entirely
+    os.makedirs(cache_dir, exist_ok=True)
+    _link_or_copy(package_path, cached_zip)
+    with open(cached_sha1, 'w', encoding='ascii') as f:
+        f.write(sha1)
+
+    log.append(f"  Size: {file_size / 1024:.2f} KB")
+    log.append(f"  SHA1: {sha1}")
     
     return {
         'platform': platform,
         'filename': package_name,
         'sha1': sha1,
         'size': file_size,
-        'releaseDate': date_stamp
+        'releaseDate': date_stamp,
+        'log': log
     }
 
-def generate_updates_xri(packages, version, min_version, max_version, repo_root, dist_dir):
+# Boilerplate paragraphs for each package <description> block
+_PACKAGE_PARAGRAPHS = (
+    "Copyright (c) 2026 Lucas Saavedra Vaz (C++ Port for PixInsight)",
+    "Copyright (c) 2025 Riccardo Paterniti (Original Python implementation)",
+    "This program is free software: you can redistribute it and/or modify",
+    "it under the terms of the GNU General Public License as published by",
+    "the Free Software Foundation, either version 3 of the License, or",
+    "(at your option) any later version.",
+)
+
+def generate_updates_xri(packages, version, min_version, max_version, description, dist_dir):
     """Generate updates.xri manifest file"""
     
     print("\nGenerating updates.xri...")
     
-    # Get module description
-    readme_path = repo_root / "README.md"
-    description = get_module_description(readme_path)
-    
     # Platform mapping for xri
     platform_names = {
         'linux': 'linux',
@@ -128,60 +318,41 @@ def generate_updates_xri(packages, version, min_version, max_version, repo_root,
         'windows': 'windows'
     }
     
-    # Build XML content
-    xml_lines = ['<?xml version="1.0" encoding="UTF-8"?>']
-    xml_lines.append('<xri version="1.0">')
-    xml_lines.append('  <description>')
-    xml_lines.append('    <p>')
-    xml_lines.append(f'      <b>{MODULE_TITLE} Repository</b>')
-    xml_lines.append('    </p>')
-    xml_lines.append('    <p>')
-    xml_lines.append(f'      {description}')
-    xml_lines.append('    </p>')
-    xml_lines.append('  </description>')
-    xml_lines.append('')
-    
-    # Create platform sections
+    # Build the manifest as an element tree and let the C serializer
+    # handle escaping and output; one <platform> block per package
+    root = ET.Element('xri', version="1.0")
+    repo_desc = ET.SubElement(root, 'description')
+    ET.SubElement(ET.SubElement(repo_desc, 'p'), 'b').text = f"{MODULE_TITLE} Repository"
+    ET.SubElement(repo_desc, 'p').text = description
+
     for pkg in packages:
-        platform_name = platform_names[pkg['platform']]
-        xml_lines.append(f'  <platform os="{platform_name}" arch="noarch" version="{min_version}:{max_version}">')
-        xml_lines.append(f'    <package fileName="{pkg["filename"]}" sha1="{pkg["sha1"]}" type="module" releaseDate="{pkg["releaseDate"]}">')
-        xml_lines.append('      <title>')
-        xml_lines.append(f'        {MODULE_TITLE} v{version}')
-        xml_lines.append('      </title>')
-        xml_lines.append('      <description>')
-        xml_lines.append('        <p>')
-        xml_lines.append(f'          This update installs the {MODULE_TITLE} version {version}')
-        xml_lines.append('        </p>')
-        xml_lines.append('        <p>')
-        xml_lines.append('          Copyright (c) 2026 Lucas Saavedra Vaz (C++ Port for PixInsight)')
-        xml_lines.append('        </p>')
-        xml_lines.append('        <p>')
-        xml_lines.append('          Copyright (c) 2025 Riccardo Paterniti (Original Python implementation)')
-        xml_lines.append('        </p>')
-        xml_lines.append('        <p>')
-        xml_lines.append('          This program is free software: you can redistribute it and/or modify')
-        xml_lines.append('        </p>')
-        xml_lines.append('        <p>')
-        xml_lines.append('          it under the terms of the GNU General Public License as published by')
-        xml_lines.append('        </p>')
-        xml_lines.append('        <p>')
-        xml_lines.append('          the Free Software Foundation, either version 3 of the License, or')
-        xml_lines.append('        </p>')
-        xml_lines.append('        <p>')
-        xml_lines.append('          (at your option) any later version.')
-        xml_lines.append('        </p>')
-        xml_lines.append('      </description>')
-        xml_lines.append('    </package>')
-        xml_lines.append('  </platform>')
-    
-    xml_lines.append('</xri>')
-    xml_lines.append('')  # Final newline
+        platform_el = ET.SubElement(root, 'platform',
+                                    os=platform_names[pkg['platform']],
+                                    arch="noarch",
+                                    version=f"{min_version}:{max_version}")
+        package_el = ET.SubElement(platform_el, 'package',
+                                   fileName=pkg['filename'],
+                                   sha1=pkg['sha1'],
+                                   type="module",
+                                   releaseDate=pkg['releaseDate'])
+        ET.SubElement(package_el, 'title').text = f"{MODULE_TITLE} v{version}"
+        pkg_desc = ET.SubElement(package_el, 'description')
+        ET.SubElement(pkg_desc, 'p').text = (
+            f"This update installs the {MODULE_TITLE} version {version}")
+        for paragraph in _PACKAGE_PARAGRAPHS:
+            ET.SubElement(pkg_desc, 'p').text = paragraph
+
+    ET.indent(root, space='  ')
+    content = ET.tostring(root, encoding='unicode', xml_declaration=True) + "\n"
     
-    # Write XRI file with UTF-8 encoding (no BOM)
+    # Write XRI file with UTF-8 encoding (no BOM) in one raw write,
+    # bypassing the text-layer codec and newline handling
     xri_path = dist_dir / "updates.xri"
-    with open(xri_path, 'w', encoding='utf-8', newline='\n') as f:
-        f.write('\n'.join(xml_lines))
+    fd = os.open(xri_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, content.encode('utf-8'))
+    finally:
+        os.close(fd)
     
     print(f"  Created: {xri_path}")
     print(f"  Platforms: {', '.join([p['platform'] for p in packages])}")
@@ -221,11 +392,28 @@ def main():
     # Determine platforms
     platforms = ['linux', 'macosx', 'windows'] if args.platform == 'all' else [args.platform]
     
-    # Create packages for each platform
+    # Create packages for each platform; each is an independent
+    # compress-and-hash workload, so multi-platform runs use one process
+    # per platform
+    rsc_dir = repo_root / "rsc"
+    svg_files = sorted(_scandir_files(rsc_dir, ".svg")) if rsc_dir.exists() else []
+    doc_tools_dir = repo_root / "doc" / "tools"
+    doc_files = sorted(_scandir_files(doc_tools_dir)) if doc_tools_dir.exists() else []
+
+    if len(platforms) > 1:
+        worker = partial(create_package, version=args.version,
+                         repo_root=repo_root, dist_dir=dist_dir,
+                         svg_files=svg_files, doc_files=doc_files)
+        with ProcessPoolExecutor(max_workers=len(platforms)) as executor:
+            results = list(executor.map(worker, platforms))
+    else:
+        results = [create_package(platforms[0], args.version, repo_root,
+                                  dist_dir, svg_files, doc_files)]
+
     packages = []
-    for platform in platforms:
-        pkg = create_package(platform, args.version, repo_root, dist_dir)
+    for platform, pkg in zip(platforms, results):
         if pkg:
+            print('\n'.join(pkg.pop('log')))
             packages.append(pkg)
         else:
             print(f"Error: Failed to create package for {platform}")
@@ -236,8 +424,9 @@ def main():
         sys.exit(1)
     
     # Generate updates.xri
+    description = get_module_description(str(repo_root / "README.md"))
     xri_path = generate_updates_xri(packages, args.version, args.min_pi_version, 
-                                    args.max_pi_version, repo_root, dist_dir)
+                                    args.max_pi_version, description, dist_dir)
     
     print("\n======================================================================")
     print("✓ Release packaging completed successfully!")